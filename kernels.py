@@ -0,0 +1,68 @@
+"""
+Numeric kernels for feature extraction.
+
+burst_age_stats is compiled with Numba when it is installed; otherwise an
+equivalent NumPy implementation is used.
+"""
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional
+    njit = None
+
+
+def _burst_age_stats_numpy(cpu_times: np.ndarray, create_times: np.ndarray, now: float) -> Tuple[float, float, float, float]:
+    ages = np.clip(now - create_times, 0, None)
+    mean_b = float(cpu_times.mean()) if cpu_times.size else 0.0
+    std_b = float(cpu_times.std()) if cpu_times.size else 0.0
+    mean_a = float(ages.mean()) if ages.size else 0.0
+    std_a = float(ages.std()) if ages.size else 0.0
+    return mean_b, std_b, mean_a, std_a
+
+
+def _burst_age_stats_loop(cpu_times, create_times, now):
+    # Single fused pass per array. Values are shifted by the first element
+    # before accumulating so sum-of-squares stays accurate for large ages.
+    mean_b = 0.0
+    std_b = 0.0
+    n = cpu_times.shape[0]
+    if n > 0:
+        k = cpu_times[0]
+        s = 0.0
+        sq = 0.0
+        for i in range(n):
+            d = cpu_times[i] - k
+            s += d
+            sq += d * d
+        mean_b = k + s / n
+        std_b = np.sqrt(max(sq / n - (s / n) ** 2, 0.0))
+
+    mean_a = 0.0
+    std_a = 0.0
+    n = create_times.shape[0]
+    if n > 0:
+        k = max(now - create_times[0], 0.0)
+        s = 0.0
+        sq = 0.0
+        for i in range(n):
+            d = max(now - create_times[i], 0.0) - k
+            s += d
+            sq += d * d
+        mean_a = k + s / n
+        std_a = np.sqrt(max(sq / n - (s / n) ** 2, 0.0))
+
+    return mean_b, std_b, mean_a, std_a
+
+
+if njit is not None:
+    # Explicit signature compiles at import; cache=True reuses the build across restarts.
+    burst_age_stats = njit(
+        "UniTuple(float64, 4)(float64[:], float64[:], float64)",
+        cache=True,
+        fastmath=True,
+    )(_burst_age_stats_loop)
+else:
+    burst_age_stats = _burst_age_stats_numpy
@@ -6,6 +6,7 @@
 
 	let lastPayload = null;
 	let filterTerm = "";
+	const decoder = new TextDecoder();
 
 	function fmt(n, digits = 2) {
 		if (n === null || n === undefined || Number.isNaN(n)) return "—";
@@ -53,6 +54,7 @@
 	function connect() {
 		const proto = location.protocol === "https:" ? "wss:" : "ws:";
 		const ws = new WebSocket(`${proto}//${location.host}/ws?top_n=50&quantum=3`);
+		ws.binaryType = "arraybuffer";
 		let lastMsgAt = Date.now();
 
 		ws.onopen = () => {
@@ -61,7 +63,14 @@
 		ws.onmessage = (ev) => {
 			lastMsgAt = Date.now();
 			try {
-				const payload = JSON.parse(ev.data);
+				const text = typeof ev.data === "string" ? ev.data : decoder.decode(ev.data);
+				const payload = JSON.parse(text);
+				if (payload.error) {
+					// Server closes the socket after this; onclose reconnects
+					statusEl.textContent = "Error";
+					console.error("Live update failed", payload.error);
+					return;
+				}
 				lastPayload = payload;
 				render(payload);
 			} catch (e) {
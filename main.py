@@ -1,43 +1,141 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import Literal, Optional, List, Dict, Any
 
-from process_manager import list_processes, kill_process, compute_rr_features_from_system, compute_rr_features_for_pid, pick_top_processes, get_process_snapshot
+from process_manager import list_processes, kill_process, compute_rr_features_from_system, compute_rr_features_for_pid, pick_top_processes, get_process_snapshot, get_system_load, last_scan_create_times, fill_features_for_pids, FEATURE_ORDER, ProcRow
 from fastapi import WebSocket, WebSocketDisconnect
 import asyncio
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+import orjson
 from model.predict import predict_completion
+try:
+	# Takes a 2-D array whose columns follow FEATURE_ORDER
+	from model.predict import predict_completion_batch
+except ImportError:
+	# Model packages without batch inference: fall back to one call per row.
+	def predict_completion_batch(X):
+		return [predict_completion(dict(zip(FEATURE_ORDER, row))) for row in X.tolist()]
 from model.train import train as train_model
+from prediction_cache import PredictionCache
 from runtime_tracker import ProcessRuntimeTracker
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 runtime_tracker = ProcessRuntimeTracker()
 
+# Training runs in its own process so it never holds an API worker thread or the GIL.
+# "spawn": forking this multi-threaded server can deadlock NumPy/sklearn in the child.
+_train_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+# Finished jobs stay pollable until pruned oldest-first once _TRAIN_JOBS_MAX is reached.
+# Only touched from async handlers, so the single event loop serialises access.
+_train_jobs: "OrderedDict[str, Future]" = OrderedDict()
+_TRAIN_JOBS_MAX = 32
+
 
 def _runtime_metadata(pid: int, name: str, create_time: Optional[float], predicted: float):
 	if create_time is None:
 		return None, "unknown"
 
-	record = runtime_tracker.update_running(pid, name, float(create_time), predicted)
+	record = runtime_tracker.update_running(pid, name, create_time, predicted)
 	actual = runtime_tracker.current_elapsed(pid)
 	status = runtime_tracker.status_for(pid)
-	return (float(actual) if actual is not None else None), status
+	return actual, status
 
 
 def _serialize_completion(record):
 	return {
 		"pid": record.pid,
 		"name": record.name,
-		"predicted_turnaround_time": float(record.predicted),
-		"actual_turnaround_time": float(record.actual_duration) if record.actual_duration is not None else None,
+		"predicted_turnaround_time": record.predicted,
+		"actual_turnaround_time": record.actual_duration,
 		"turnaround_status": record.status,
-		"completed_at": float(record.completed_at) if record.completed_at is not None else None,
-		"duration_error": (float(record.actual_duration) - float(record.predicted)) if record.actual_duration is not None else None,
+		"completed_at": record.completed_at,
+		"duration_error": (record.actual_duration - record.predicted) if record.actual_duration is not None else None,
 	}
 
+
+_prediction_cache = PredictionCache()
+
+
+async def _predict_pid_features(X: np.ndarray) -> List[float]:
+	"""
+	Predictions for a matrix of per-PID feature rows (columns in FEATURE_ORDER).
+	Cache misses are predicted together in one batched call on their quantized rows.
+	"""
+	keys = [_prediction_cache.key(row) for row in X.tolist()]
+	found, missing = _prediction_cache.lookup(keys)
+	if missing:
+		X_missing = _prediction_cache.quantize(X[list(missing.values())])
+		preds = await asyncio.to_thread(predict_completion_batch, X_missing)
+		for key, value in zip(missing, np.asarray(preds).tolist()):
+			_prediction_cache.put(key, value)
+			found[key] = value
+	return [found[key] for key in keys]
+
+
+class _FeatureBuffer:
+	"""
+	float32 feature matrix reused across calls. It starts empty and grows to
+	the largest batch actually seen, never to a client-supplied size.
+	"""
+
+	def __init__(self) -> None:
+		self._data = np.empty((0, len(FEATURE_ORDER)), dtype=np.float32)
+
+	def rows(self, n: int) -> np.ndarray:
+		if self._data.shape[0] < n:
+			self._data = np.empty((n, len(FEATURE_ORDER)), dtype=np.float32)
+		return self._data[:n]
+
+
+async def _predict_selected(
+	selected: List[ProcRow],
+	quantum: float,
+	system_load: float,
+	skip_errors: bool = False,
+	out: Optional[_FeatureBuffer] = None,
+):
+	"""
+	Fill one float32 feature row per selected process in a single worker call,
+	then run a single batched prediction over the rows that could be read.
+	`out` is an optional buffer reused across calls; the returned matrix may be
+	a view into it.
+	Returns (processes, features matrix, predictions), aligned by row.
+	"""
+	n = len(selected)
+	if out is None:
+		X = np.empty((n, len(FEATURE_ORDER)), dtype=np.float32)
+	else:
+		X = out.rows(n)
+	ok = await asyncio.to_thread(fill_features_for_pids, X, [p.pid for p in selected], quantum, system_load, skip_errors)
+	# Skip processes that vanished or errored mid-batch
+	procs = [p for p, good in zip(selected, ok.tolist()) if good]
+	if not procs:
+		return [], X[:0], []
+	if len(procs) < n:
+		X = X[ok]
+
+	preds = await _predict_pid_features(X)
+	return procs, X, preds
+
+
+async def _sample_system_load(request: Request) -> float:
+	# One system-load sample per request, shared by every feature builder it calls
+	request.state.system_load = get_system_load()
+	return request.state.system_load
+
+
+def _dumps(payload) -> bytes:
+	# Same options ORJSONResponse uses, so numpy scalars from the model serialize as-is.
+	return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
 # Allow cross-origin requests for local development and future frontend
 app.add_middleware(
 	CORSMiddleware,
@@ -57,42 +155,46 @@ class PredictRRResponse(BaseModel):
 	predicted_turnaround_time: float
 	features: Dict[str, Any]
 
-class PredictProcessResponse(BaseModel):
+class PredictProcessItem(BaseModel):
 	pid: int
 	name: str
 	predicted_turnaround_time: float
 	actual_turnaround_time: Optional[float] = Field(default=None)
 	turnaround_status: Literal["running", "completed", "unknown"] = "unknown"
+
+class PredictProcessResponse(PredictProcessItem):
 	features: Dict[str, Any]
 
 class PredictProcessesResponse(BaseModel):
 	count: int
-	items: List[PredictProcessResponse]
+	items: List[PredictProcessItem]
+	# Row i holds the features of items[i], columns in feature_order
+	feature_order: List[str]
+	features_matrix: List[List[float]]
+	predictions: List[float]
 	params: Dict[str, Any]
 
 
 @app.get("/processes")
-def get_processes(
+async def get_processes(
 	page: int = Query(1, gt=0),
 	page_size: int = Query(25, gt=0, le=500),
 	sort_by: Literal["name", "cpu_percent", "memory_percent", "cpu_time", "create_time"] = "cpu_percent",
 	order: Literal["asc", "desc"] = "desc"
 ):
-	procs = list_processes()
+	table = await asyncio.to_thread(list_processes)
 
-	# Sorting
-	reverse = (order == "desc")
-	try:
-		procs.sort(key=lambda p: (p.get(sort_by) is None, p.get(sort_by)), reverse=reverse)
-	except Exception:
-		# Fallback to no sort if unexpected data
-		pass
-
-	# Pagination
-	total = len(procs)
+	# Pagination; rows are only materialized for the requested page
+	total = len(table)
 	start = (page - 1) * page_size
 	end = start + page_size
-	data = procs[start:end]
+
+	# Sorting: partial top-k selection when only the head of the list is needed
+	if end < total / 10:
+		idx = table.top(end, sort_by, order)
+	else:
+		idx = table.order(sort_by, order)
+	data = [r._asdict() for r in table.rows(idx[start:end])]
 
 	return {
 		"page": page,
@@ -106,13 +208,13 @@ def terminate_process(pid: int):
     return kill_process(pid)
 
 @app.get("/predict/system", response_model=PredictRRResponse)
-def predict_from_system(quantum: float = Query(1.0, gt=0)):
+async def predict_from_system(quantum: float = Query(1.0, gt=0), system_load: float = Depends(_sample_system_load)):
 	"""
 	Compute model features from live system processes and predict turnaround time.
 	"""
 	try:
-		features = compute_rr_features_from_system(quantum)
-		pred = predict_completion(features)
+		features = await asyncio.to_thread(compute_rr_features_from_system, quantum, system_load)
+		pred = await asyncio.to_thread(predict_completion, features)
 		return {
 			"predicted_turnaround_time": pred,
 			"features": features
@@ -124,15 +226,18 @@ def predict_from_system(quantum: float = Query(1.0, gt=0)):
 		raise HTTPException(status_code=500, detail=f"System prediction failed: {e}")
 
 
-@app.get("/predict/process/{pid}", response_model=PredictProcessResponse)
-def predict_for_process(pid: int, quantum: float = Query(1.0, gt=0)):
+# Hot paths: handlers already return the documented shape, so skip response
+# validation and keep the models for the OpenAPI schema only.
+@app.get("/predict/process/{pid}", response_model=None, responses={200: {"model": PredictProcessResponse}})
+async def predict_for_process(pid: int, quantum: float = Query(1.0, gt=0), system_load: float = Depends(_sample_system_load)):
 	try:
-		features = compute_rr_features_for_pid(pid, quantum)
+		features = await asyncio.to_thread(compute_rr_features_for_pid, pid, quantum, system_load)
 		if features is None:
 			raise HTTPException(status_code=404, detail="Process not found or inaccessible")
-		pred = predict_completion(features)
+		row = np.array([[features[k] for k in FEATURE_ORDER]], dtype=np.float32)
+		pred = (await _predict_pid_features(row))[0]
 
-		snapshot = get_process_snapshot(pid)
+		snapshot = await asyncio.to_thread(get_process_snapshot, pid)
 		if snapshot is None:
 			raise HTTPException(status_code=404, detail="Process not found or inaccessible")
 
@@ -154,45 +259,193 @@ def predict_for_process(pid: int, quantum: float = Query(1.0, gt=0)):
 		raise HTTPException(status_code=500, detail=f"Per-process prediction failed: {e}")
 
 
-@app.get("/predict/processes", response_model=PredictProcessesResponse)
-def predict_for_top_processes(
+@app.get("/predict/cache")
+def prediction_cache_stats():
+	"""Hit/miss counters of the per-PID prediction cache."""
+	return _prediction_cache.stats()
+
+
+@app.get("/predict/processes", response_model=None, responses={200: {"model": PredictProcessesResponse}})
+async def predict_for_top_processes(
 	top_n: int = Query(10, gt=0, le=100),
 	sort_by: Literal["name","cpu_percent","memory_percent","cpu_time","create_time"] = "cpu_percent",
 	order: Literal["asc","desc"] = "desc",
 	quantum: float = Query(1.0, gt=0),
+	system_load: float = Depends(_sample_system_load),
 ):
 	try:
-		selected = pick_top_processes(top_n=top_n, sort_by=sort_by, order=order)
+		selected = await asyncio.to_thread(pick_top_processes, top_n=top_n, sort_by=sort_by, order=order)
 		items: List[Dict[str, Any]] = []
 		active_pids: List[int] = []
-		for p in selected:
-			features = compute_rr_features_for_pid(p["pid"], quantum)
-			if features is None:
-				continue
-			pred = predict_completion(features)
-			create_time = p.get("create_time")
-			actual, status = _runtime_metadata(p["pid"], p["name"], create_time, pred)
-			active_pids.append(p["pid"])
+		procs, X, preds = await _predict_selected(selected, quantum, system_load)
+		for p, pred in zip(procs, preds):
+			create_time = p.create_time
+			actual, status = _runtime_metadata(p.pid, p.name, create_time, pred)
+			active_pids.append(p.pid)
 			items.append({
-				"pid": p["pid"],
-				"name": p["name"],
+				"pid": p.pid,
+				"name": p.name,
 				"predicted_turnaround_time": pred,
 				"actual_turnaround_time": actual,
 				"turnaround_status": status,
-				"features": features
 			})
 
-		runtime_tracker.mark_missing(active_pids)
+		runtime_tracker.mark_missing(active_pids, last_scan_create_times())
 
-		return {
+		# Returned as a Response so FastAPI skips jsonable_encoder; orjson
+		# (OPT_SERIALIZE_NUMPY) writes the float32 matrix straight from its buffer.
+		return ORJSONResponse({
 			"count": len(items),
 			"items": items,
+			"feature_order": FEATURE_ORDER,
+			"features_matrix": X,
+			"predictions": preds,
 			"params": {"top_n": top_n, "sort_by": sort_by, "order": order, "quantum": quantum}
-		}
+		})
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Batch process prediction failed: {e}")
 
 
+async def _build_live_payload(top_n: int, quantum: float, out: Optional[_FeatureBuffer] = None) -> Dict[str, Any]:
+	# Build payload: system prediction + per-process items (top N by CPU%)
+	system_load = get_system_load()
+	features_sys = await asyncio.to_thread(compute_rr_features_from_system, quantum, system_load)
+	pred_sys = await asyncio.to_thread(predict_completion, features_sys)
+
+	selected = await asyncio.to_thread(pick_top_processes, top_n=top_n, sort_by="cpu_percent", order="desc")
+	items = []
+	active_pids: List[int] = []
+	procs, _, preds = await _predict_selected(selected, quantum, system_load, skip_errors=True, out=out)
+	for p, pred in zip(procs, preds):
+		create_time = p.create_time
+		actual, status = _runtime_metadata(p.pid, p.name, create_time, pred)
+		active_pids.append(p.pid)
+		items.append({
+			"pid": p.pid,
+			"name": p.name,
+			"cpu_percent": p.cpu_percent,
+			"memory_percent": p.memory_percent,
+			"cpu_time": p.cpu_time,
+			"predicted_turnaround_time": pred,
+			"actual_turnaround_time": actual,
+			"turnaround_status": status,
+		})
+
+	runtime_tracker.mark_missing(active_pids, last_scan_create_times())
+	recent = [_serialize_completion(r) for r in runtime_tracker.recent_completions()]
+
+	return {
+		"system_prediction": pred_sys,
+		"items": items,
+		"quantum": quantum,
+		"count": len(items),
+		"recent_completions": recent,
+	}
+
+
+LIVE_INTERVAL = 2.0
+# Consecutive failed ticks after which subscribers are told and disconnected
+LIVE_MAX_FAILURES = 3
+
+
+class _LiveFeedError(Exception):
+	pass
+
+
+class _LiveFeed:
+	"""
+	Background producer for one (top_n, quantum) pair: builds the /ws payload
+	every LIVE_INTERVAL seconds and fans the encoded bytes out to every
+	subscribed socket, so K clients cost one computation per tick.
+	After LIVE_MAX_FAILURES failed ticks in a row, every wake-up reports the
+	error instead until a tick succeeds again.
+	"""
+
+	def __init__(self, top_n: int, quantum: float) -> None:
+		self.top_n = top_n
+		self.quantum = quantum
+		self.payload: Optional[bytes] = None
+		self.subscribers = 0
+		self.error: Optional[str] = None
+		self._failures = 0
+		self._updated = asyncio.Event()
+		self._task: Optional[asyncio.Task] = None
+		# Feature matrix reused every tick instead of per-PID dicts
+		self._features = _FeatureBuffer()
+
+	def start(self) -> None:
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is None:
+			return
+		self._task.cancel()
+		try:
+			await self._task
+		except asyncio.CancelledError:
+			pass
+		self._task = None
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				self.payload = _dumps(await _build_live_payload(self.top_n, self.quantum, self._features))
+			except Exception as e:
+				# A one-off failure just skips the tick; repeated failures are reported
+				self._failures += 1
+				if self._failures >= LIVE_MAX_FAILURES:
+					self.error = f"Live update failed: {e}"
+					self._wake()
+			else:
+				self._failures = 0
+				self.error = None
+				self._wake()
+			await asyncio.sleep(LIVE_INTERVAL)
+
+	def _wake(self) -> None:
+		updated, self._updated = self._updated, asyncio.Event()
+		updated.set()
+
+	async def next_payload(self) -> bytes:
+		"""Next payload; raises _LiveFeedError while the feed keeps failing."""
+		await self._updated.wait()
+		if self.error is not None:
+			raise _LiveFeedError(self.error)
+		return self.payload
+
+
+_live_feeds: Dict[Any, _LiveFeed] = {}
+
+
+def _subscribe(top_n: int, quantum: float) -> _LiveFeed:
+	feed = _live_feeds.get((top_n, quantum))
+	if feed is None:
+		feed = _live_feeds[(top_n, quantum)] = _LiveFeed(top_n, quantum)
+		feed.start()
+	feed.subscribers += 1
+	return feed
+
+
+async def _unsubscribe(feed: _LiveFeed) -> None:
+	feed.subscribers -= 1
+	if feed.subscribers <= 0 and _live_feeds.get((feed.top_n, feed.quantum)) is feed:
+		del _live_feeds[(feed.top_n, feed.quantum)]
+		await feed.stop()
+
+
+@app.on_event("shutdown")
+async def _stop_live_feeds():
+	for feed in list(_live_feeds.values()):
+		await feed.stop()
+	_live_feeds.clear()
+
+
+@app.on_event("shutdown")
+def _stop_train_pool():
+	_train_pool.shutdown(wait=False, cancel_futures=True)
+
+
 @app.websocket("/ws")
 async def ws_live(websocket: WebSocket):
 	# Optional query params: top_n, quantum
@@ -205,66 +458,97 @@ async def ws_live(websocket: WebSocket):
 		quantum = 3.0
 
 	await websocket.accept()
+	feed = _subscribe(top_n, quantum)
+	# Clients never send anything; reading is how a disconnect gets noticed
+	# even while no payloads are being sent.
+	receiver = asyncio.create_task(websocket.receive())
+	waiter: Optional[asyncio.Task] = None
 	try:
+		# Send the latest snapshot straight away if the feed already has one
+		if feed.payload is not None and feed.error is None:
+			await websocket.send_bytes(feed.payload)
 		while True:
-			# Build payload: system prediction + per-process items (top N by CPU%)
-			features_sys = compute_rr_features_from_system(quantum)
-			pred_sys = predict_completion(features_sys)
-
-			selected = pick_top_processes(top_n=top_n, sort_by="cpu_percent", order="desc")
-			items = []
-			active_pids: List[int] = []
-			for p in selected:
-				try:
-					f = compute_rr_features_for_pid(p["pid"], quantum)
-					if f is None:
-						continue
-					pred = predict_completion(f)
-					create_time = p.get("create_time")
-					actual, status = _runtime_metadata(p["pid"], p["name"], create_time, pred)
-					active_pids.append(p["pid"])
-					items.append({
-						"pid": p["pid"],
-						"name": p["name"],
-						"cpu_percent": p.get("cpu_percent", 0),
-						"memory_percent": p.get("memory_percent", 0),
-						"cpu_time": p.get("cpu_time", 0),
-						"predicted_turnaround_time": pred,
-						"actual_turnaround_time": actual,
-						"turnaround_status": status,
-					})
-				except Exception:
-					# Skip processes that vanished or errored mid-loop
-					continue
-
-			runtime_tracker.mark_missing(active_pids)
-			recent = [_serialize_completion(r) for r in runtime_tracker.recent_completions()]
-
-			await websocket.send_json({
-				"system_prediction": float(pred_sys),
-				"items": items,
-				"quantum": quantum,
-				"count": len(items),
-				"recent_completions": recent,
-			})
-			await asyncio.sleep(2.0)
+			if waiter is None:
+				waiter = asyncio.create_task(feed.next_payload())
+			done, _ = await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+			if receiver in done:
+				if receiver.result()["type"] == "websocket.disconnect":
+					return
+				receiver = asyncio.create_task(websocket.receive())
+			if waiter in done:
+				payload = waiter.result()
+				waiter = None
+				await websocket.send_bytes(payload)
 	except WebSocketDisconnect:
 		return
+	except _LiveFeedError as e:
+		# Tell the client and close so it reconnects (and retries) later
+		try:
+			await websocket.send_bytes(_dumps({"error": str(e)}))
+			await websocket.close(code=1011)
+		except Exception:
+			pass
 	except Exception:
 		# Close socket on unexpected error
 		try:
 			await websocket.close()
 		except Exception:
 			pass
+	finally:
+		receiver.cancel()
+		if waiter is not None:
+			waiter.cancel()
+		await _unsubscribe(feed)
+
+def _job_state(future: Future) -> str:
+	return "running" if future.running() else "pending"
+
 
 @app.post("/train")
-def train():
+async def train():
 	"""
-	Trigger model training (dev-only).
-	Returns training metrics and artifact paths.
+	Trigger model training (dev-only) in a background process.
+	Returns a job id; poll /train/status/{job_id} for metrics and artifact paths.
+	While a job is still pending or running, its id is returned instead of queueing another.
 	"""
+	for job_id, future in _train_jobs.items():
+		if not future.done():
+			return {"job_id": job_id, "status": _job_state(future)}
 	try:
-		result = train_model()
-		return result
+		future = _train_pool.submit(train_model)
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Training failed: {e}")
+	# Every stored job is finished here; drop the oldest to make room for this one
+	excess = len(_train_jobs) + 1 - _TRAIN_JOBS_MAX
+	for _ in range(max(excess, 0)):
+		_train_jobs.popitem(last=False)
+	job_id = uuid.uuid4().hex
+	_train_jobs[job_id] = future
+	return {"job_id": job_id, "status": "pending"}
+
+
+@app.get("/train/status/{job_id}")
+async def train_status(job_id: str):
+	future = _train_jobs.get(job_id)
+	if future is None:
+		raise HTTPException(status_code=404, detail="Training job not found")
+	if not future.done():
+		return {"job_id": job_id, "status": _job_state(future)}
+	if future.cancelled():
+		return {"job_id": job_id, "status": "cancelled"}
+	error = future.exception()
+	if error is not None:
+		return {"job_id": job_id, "status": "failed", "error": f"Training failed: {error}"}
+	return {"job_id": job_id, "status": "completed", "result": future.result()}
+
+
+if __name__ == "__main__":
+	import uvicorn
+
+	try:
+		import uvloop  # noqa: F401
+		loop = "uvloop"
+	except ImportError:
+		# uvloop is not available on Windows
+		loop = "asyncio"
+	uvicorn.run(app, host="127.0.0.1", port=8000, loop=loop, http="httptools", ws="websockets")
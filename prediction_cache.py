@@ -0,0 +1,87 @@
+"""
+LRU cache for per-PID completion-time predictions.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from process_manager import FEATURE_ORDER
+
+
+class PredictionCache:
+    """
+    Bounded LRU of per-PID predictions keyed on features rounded to `ndigits`.
+    Per-PID features only vary in the VARYING fields (std_*=0, num_processes=1),
+    so processes with near-identical CPU time and age share one model call.
+    time_quantum is the same for a whole batch, so it is keyed exactly and
+    never rounded: the model always sees the requested quantum.
+    """
+    VARYING = ("mean_burst", "mean_arrival", "system_load")
+    EXACT = ("time_quantum",)
+
+    def __init__(self, maxsize: int = 4096, ndigits: int = 1) -> None:
+        self.maxsize = maxsize
+        self.ndigits = ndigits
+        self.hits = 0
+        self.misses = 0
+        self._cols = [FEATURE_ORDER.index(k) for k in self.VARYING]
+        self._exact_cols = [FEATURE_ORDER.index(k) for k in self.EXACT]
+        self._data: "OrderedDict[tuple, float]" = OrderedDict()
+
+    def quantize(self, X: np.ndarray) -> np.ndarray:
+        q = X.copy()
+        q[:, self._cols] = np.round(q[:, self._cols], self.ndigits)
+        return q
+
+    def key(self, row: List[float]) -> tuple:
+        return tuple(round(row[j], self.ndigits) for j in self._cols) + tuple(row[j] for j in self._exact_cols)
+
+    def get(self, key: tuple) -> Optional[float]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def lookup(self, keys: List[tuple]) -> Tuple[Dict[tuple, float], Dict[tuple, int]]:
+        """
+        Split a batch of keys into cached values and the first row index of each
+        key that still needs the model. Every row that skips the model counts as
+        a hit, including repeats of a key already seen in this batch; each unique
+        key sent to the model counts as one miss.
+        """
+        found: Dict[tuple, float] = {}
+        missing: Dict[tuple, int] = {}
+        for i, key in enumerate(keys):
+            if key in found or key in missing:
+                self.hits += 1
+                continue
+            value = self.get(key)
+            if value is None:
+                missing[key] = i
+            else:
+                found[key] = value
+        return found, missing
+
+    def put(self, key: tuple, value: float) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -1,26 +1,293 @@
+import os
 import psutil
+import sys
+import threading
 import time
-from typing import Dict, Optional, List
-import statistics
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Sequence, Tuple
+import numpy as np
 
+from kernels import burst_age_stats
 
-def list_processes():
-    processes = []
+# Column order of the feature vector fed to the turnaround-time model.
+FEATURE_ORDER = (
+    "mean_burst",
+    "std_burst",
+    "mean_arrival",
+    "std_arrival",
+    "num_processes",
+    "system_load",
+    "time_quantum",
+)
+
+# One materialized process row; missing numeric values are None.
+ProcRow = namedtuple("ProcRow", "pid name cpu_percent memory_percent cpu_time create_time")
+
+
+@dataclass
+class ProcessTable:
+    """
+    One process scan stored column-wise: parallel arrays indexed by row.
+    Numeric values psutil could not read are NaN.
+    """
+    pids: np.ndarray            # int64
+    names: List[str]
+    cpu_percent: np.ndarray     # float64
+    memory_percent: np.ndarray  # float64
+    cpu_time: np.ndarray        # float64, user + system seconds
+    create_time: np.ndarray     # float64, epoch seconds
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _sort_key(self, sort_by: str, order: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (valid row indices, ascending sort key for them, missing row indices).
+        desc negates the key rather than reversing, so ties keep index order.
+        """
+        if sort_by == "name":
+            # Rank names so they can be negated like a numeric column
+            _, key = np.unique(np.asarray(self.names, dtype=str), return_inverse=True)
+            key = key.astype(np.float64)
+            valid = np.arange(len(self))
+            missing = valid[:0]
+        else:
+            column = getattr(self, sort_by)
+            is_valid = ~np.isnan(column)
+            valid = np.flatnonzero(is_valid)
+            missing = np.flatnonzero(~is_valid)
+            key = column[valid]
+        if order == "desc":
+            key = -key
+        return valid, key, missing
+
+    def order(self, sort_by: str = "cpu_percent", order: str = "desc") -> np.ndarray:
+        """
+        Row indices sorted by column `sort_by`; ties keep row order and missing
+        values always sort last.
+        """
+        valid, key, missing = self._sort_key(sort_by, order)
+        idx = valid[np.lexsort((valid, key))]
+        return np.concatenate((idx, missing))
+
+    def top(self, k: int, sort_by: str = "cpu_percent", order: str = "desc") -> np.ndarray:
+        """
+        First k indices of order(sort_by, order), found by partial selection:
+        O(N + m log m) rather than a full O(N log N) sort, where m is k plus
+        the rows tied with the k-th value.
+        """
+        k = max(0, k)
+        valid, key, missing = self._sort_key(sort_by, order)
+        if k >= valid.size:
+            idx = valid[np.lexsort((valid, key))]
+            return np.concatenate((idx, missing))[:k]
+        if k == 0:
+            return valid[:0]
+        # Keep the whole tie group at the cut so the tie-break matches order()
+        kth = np.partition(key, k - 1)[k - 1]
+        keep = key <= kth
+        valid, key = valid[keep], key[keep]
+        return valid[np.lexsort((valid, key))][:k]
+
+    def rows(self, idx: Optional[Sequence[int]] = None) -> List[ProcRow]:
+        """Materialize rows as ProcRow tuples; NaN becomes None."""
+        if idx is None:
+            idx = np.arange(len(self))
+        idx = np.asarray(idx, dtype=np.intp)
+        names = self.names
+        columns = zip(
+            self.pids[idx].tolist(),
+            idx.tolist(),
+            self.cpu_percent[idx].tolist(),
+            self.memory_percent[idx].tolist(),
+            self.cpu_time[idx].tolist(),
+            self.create_time[idx].tolist(),
+        )
+        return [
+            ProcRow(
+                pid,
+                names[i],
+                _none_if_nan(cpu_pct),
+                _none_if_nan(mem_pct),
+                _none_if_nan(cpu_time),
+                _none_if_nan(create_time),
+            )
+            for pid, i, cpu_pct, mem_pct, cpu_time, create_time in columns
+        ]
+
+
+def _none_if_nan(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def _scan_processes_psutil() -> ProcessTable:
+    pids, names, cpu_pct, mem_pct, cpu_time, create_time = [], [], [], [], [], []
     for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'create_time']):
         try:
             cpu_times = proc.cpu_times()
-            total_cpu_time = cpu_times.user + cpu_times.system
-            processes.append({
-                "pid": proc.info['pid'],
-                "name": proc.info['name'],
-                "cpu_percent": proc.info['cpu_percent'],
-                "memory_percent": proc.info['memory_percent'],
-                "cpu_time": total_cpu_time,
-                "create_time": proc.info['create_time']
-            })
+            info = proc.info
+            pids.append(info['pid'])
+            names.append(info['name'] or "")
+            cpu_pct.append(info['cpu_percent'])
+            mem_pct.append(info['memory_percent'])
+            cpu_time.append(cpu_times.user + cpu_times.system)
+            create_time.append(info['create_time'])
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
-    return processes
+    # float64 arrays turn None (attributes psutil could not read) into NaN
+    return ProcessTable(
+        pids=np.array(pids, dtype=np.int64),
+        names=names,
+        cpu_percent=np.array(cpu_pct, dtype=np.float64),
+        memory_percent=np.array(mem_pct, dtype=np.float64),
+        cpu_time=np.array(cpu_time, dtype=np.float64),
+        create_time=np.array(create_time, dtype=np.float64),
+    )
+
+
+_USE_PROCFS = sys.platform.startswith("linux") and os.path.isdir("/proc")
+if _USE_PROCFS:
+    _CLK_TCK = os.sysconf("SC_CLK_TCK")
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+    _BOOT_TIME = psutil.boot_time()
+    _TOTAL_MEM = psutil.virtual_memory().total
+
+# (pid, starttime ticks) -> (cpu_time, time.monotonic()) from the previous
+# procfs scan; needed to derive cpu_percent the way psutil does.
+_prev_cpu: Dict[Tuple[int, int], Tuple[float, float]] = {}
+
+
+def _parse_proc_stat(data: bytes) -> Optional[Tuple[str, int, int, int, int]]:
+    """
+    (comm, utime, stime, starttime, rss) from one /proc/<pid>/stat line, with
+    times in clock ticks and rss in pages. None if the line is malformed or truncated.
+    """
+    # comm (field 2) is parenthesized and may itself contain spaces or ')'
+    lpar = data.find(b"(")
+    rpar = data.rfind(b")")
+    if lpar < 0 or rpar < lpar:
+        return None
+    # Fields from 3 (state) onward; field N is fields[N - 3]
+    fields = data[rpar + 2:].split()
+    try:
+        utime, stime = int(fields[11]), int(fields[12])
+        starttime, rss = int(fields[19]), int(fields[21])
+    except (IndexError, ValueError):
+        return None
+    return data[lpar + 1:rpar].decode(errors="replace"), utime, stime, starttime, rss
+
+
+def _scan_processes_linux() -> ProcessTable:
+    """
+    Same columns as _scan_processes_psutil, read from a single
+    /proc/<pid>/stat per process. Names are the kernel comm field.
+    """
+    global _prev_cpu
+    pids, names, cpu_pct, mem_pct, cpu_time, create_time = [], [], [], [], [], []
+    seen: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            # Process exited between listdir and open, or is inaccessible
+            continue
+        parsed = _parse_proc_stat(data)
+        if parsed is None:
+            continue
+        name, utime, stime, starttime, rss = parsed
+
+        pid = int(entry)
+        now = time.monotonic()
+        total = (utime + stime) / _CLK_TCK
+        prev = _prev_cpu.get((pid, starttime))
+        seen[(pid, starttime)] = (total, now)
+
+        pids.append(pid)
+        names.append(name)
+        # psutil also reports 0.0 the first time it sees a process
+        cpu_pct.append(max(total - prev[0], 0.0) / (now - prev[1]) * 100.0 if prev and now > prev[1] else 0.0)
+        mem_pct.append(rss * _PAGE_SIZE / _TOTAL_MEM * 100.0)
+        cpu_time.append(total)
+        create_time.append(_BOOT_TIME + starttime / _CLK_TCK)
+    _prev_cpu = seen
+    return ProcessTable(
+        pids=np.array(pids, dtype=np.int64),
+        names=names,
+        cpu_percent=np.array(cpu_pct, dtype=np.float64),
+        memory_percent=np.array(mem_pct, dtype=np.float64),
+        cpu_time=np.array(cpu_time, dtype=np.float64),
+        create_time=np.array(create_time, dtype=np.float64),
+    )
+
+
+# procfs is several times cheaper than psutil.process_iter; psutil elsewhere
+_scan_processes = _scan_processes_linux if _USE_PROCFS else _scan_processes_psutil
+
+
+class _ProcessCache:
+    """
+    Holds the most recent full process scan for `ttl` seconds so that one
+    request / WebSocket tick does a single psutil scan.
+    """
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._taken = float("-inf")  # time.monotonic() of the last scan
+        self._table: Optional[ProcessTable] = None
+        self._index: Dict[int, int] = {}
+        self._create_times: Dict[int, Optional[float]] = {}
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._taken < self.ttl
+
+    def table(self) -> ProcessTable:
+        with self._lock:
+            if self._table is None or not self._fresh():
+                self._table = _scan_processes()
+                pids = self._table.pids.tolist()
+                self._index = {pid: i for i, pid in enumerate(pids)}
+                self._create_times = {
+                    pid: _none_if_nan(ct) for pid, ct in zip(pids, self._table.create_time.tolist())
+                }
+                self._taken = time.monotonic()
+            return self._table
+
+    def cpu_and_create_time(self, pid: int) -> Optional[Tuple[float, float]]:
+        """Cached (cpu_time, create_time) for pid, or None if absent, unreadable or stale."""
+        with self._lock:
+            if self._table is None or not self._fresh():
+                return None
+            i = self._index.get(pid)
+            if i is None:
+                return None
+            cpu_time = float(self._table.cpu_time[i])
+            create_time = float(self._table.create_time[i])
+        if cpu_time != cpu_time or create_time != create_time:
+            return None
+        return cpu_time, create_time
+
+    def create_times(self) -> Dict[int, Optional[float]]:
+        """PID -> create_time (None if unreadable) from the last scan, however old."""
+        with self._lock:
+            return self._create_times
+
+
+_process_cache = _ProcessCache(ttl=1.0)
+
+
+def list_processes() -> ProcessTable:
+    # Shared with other callers for the cache TTL; treat as read-only.
+    return _process_cache.table()
+
+
+def last_scan_create_times() -> Dict[int, Optional[float]]:
+    """Alive PIDs from the most recent scan; never triggers a new scan."""
+    return _process_cache.create_times()
 
 
 def kill_process(pid: int):
@@ -38,36 +305,27 @@ def kill_process(pid: int):
 # Feature Extraction from Live System
 # ---------------------------------
 
-def compute_rr_features_from_system(time_quantum: float = 1.0) -> Dict[str, float]:
+def compute_rr_features_from_system(time_quantum: float = 1.0, system_load: Optional[float] = None) -> Dict[str, float]:
     """
     Derive model input features from current system processes.
     - mean_burst/std_burst: stats of per-process CPU time (user+system)
     - mean_arrival/std_arrival: stats of process ages (now - create_time)
     - num_processes: count of sampled processes
-    - system_load: overall CPU utilization (0..1)
+    - system_load: overall CPU utilization (0..1); sampled here unless supplied
     - time_quantum: provided parameter
     """
-    procs = list_processes()
+    table = list_processes()
     now = time.time()
 
-    cpu_times = [p["cpu_time"] for p in procs if p.get("cpu_time") is not None]
-    ages = [max(now - p["create_time"], 0) for p in procs if p.get("create_time") is not None]
-
-    def safe_mean(values):
-        return float(statistics.mean(values)) if values else 0.0
-
-    def safe_stdev(values):
-        return float(statistics.pstdev(values)) if values else 0.0
+    cpu_times = table.cpu_time[~np.isnan(table.cpu_time)]
+    create_times = table.create_time[~np.isnan(table.create_time)]
 
-    mean_burst = safe_mean(cpu_times)
-    std_burst = safe_stdev(cpu_times)
+    # Population mean/std of CPU times and of ages (clipped at 0)
+    mean_burst, std_burst, mean_arrival, std_arrival = burst_age_stats(cpu_times, create_times, now)
 
-    mean_arrival = safe_mean(ages)
-    std_arrival = safe_stdev(ages)
-
-    num_processes = len(procs)
-    # Use system-wide CPU percent over a short interval; divide by 100 to map to 0..1
-    system_load = psutil.cpu_percent(interval=0.1) / 100.0
+    num_processes = len(table)
+    if system_load is None:
+        system_load = get_system_load()
 
     return {
         "mean_burst": mean_burst,
@@ -100,20 +358,63 @@ def get_process_snapshot(pid: int) -> Optional[Dict]:
 	return _get_process_snapshot(pid)
 
 
-def compute_rr_features_for_pid(pid: int, time_quantum: float = 1.0) -> Optional[Dict[str, float]]:
+class _SystemLoadSampler:
+    """
+    System-wide CPU utilization (0..1) from one non-blocking /proc/stat read
+    (psutil.cpu_percent(interval=None) reports usage since the previous read).
+    Callers sample once per request / WebSocket tick and pass the value down;
+    reads closer together than `ttl` seconds reuse the last value.
+    """
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._taken = float("-inf")  # time.monotonic() of the last read
+        self._value = 0.0
+        # Seed psutil's counter so the first sample measures a real interval.
+        psutil.cpu_percent(interval=None)
+
+    def sample(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._taken >= self.ttl:
+                self._value = psutil.cpu_percent(interval=None) / 100.0
+                self._taken = now
+            return self._value
+
+
+_system_load_sampler = _SystemLoadSampler(ttl=1.0)
+
+
+def get_system_load() -> float:
+    return _system_load_sampler.sample()
+
+
+def _pid_burst_and_age(pid: int) -> Optional[Tuple[float, float]]:
+    # Prefer the current scan; only open the process if it is not in it.
+    cached = _process_cache.cpu_and_create_time(pid)
+    if cached is None:
+        snap = _get_process_snapshot(pid)
+        if snap is None:
+            return None
+        cached = (snap["cpu_time"], snap["create_time"])
+    cpu_time, create_time = cached
+    return float(cpu_time), float(max(time.time() - create_time, 0))
+
+
+def compute_rr_features_for_pid(pid: int, time_quantum: float = 1.0, system_load: Optional[float] = None) -> Optional[Dict[str, float]]:
     """
     Derive model input features for a single process.
     Maps burst to that process's CPU time; arrival to its age.
+    system_load may be supplied by the caller; otherwise it is sampled here.
     """
-    snap = _get_process_snapshot(pid)
-    if snap is None:
+    stats = _pid_burst_and_age(pid)
+    if stats is None:
         return None
+    cpu_time, age = stats
 
-    now = time.time()
-    cpu_time = float(snap["cpu_time"])
-    age = float(max(now - snap["create_time"], 0))
-
-    system_load = psutil.cpu_percent(interval=0.05) / 100.0
+    if system_load is None:
+        system_load = get_system_load()
 
     return {
         "mean_burst": cpu_time,
@@ -126,11 +427,50 @@ def compute_rr_features_for_pid(pid: int, time_quantum: float = 1.0) -> Optional
     }
 
 
-def pick_top_processes(top_n: int = 10, sort_by: str = "cpu_percent", order: str = "desc") -> List[Dict]:
-    procs = list_processes()
-    reverse = (order == "desc")
-    try:
-        procs.sort(key=lambda p: (p.get(sort_by) is None, p.get(sort_by)), reverse=reverse)
-    except Exception:
-        pass
-    return procs[:max(0, top_n)]
+def fill_features_for_pid(row: np.ndarray, pid: int, time_quantum: float = 1.0, system_load: Optional[float] = None) -> bool:
+    """
+    Same features as compute_rr_features_for_pid, written in FEATURE_ORDER into
+    `row` (a 1-D view of a preallocated matrix) instead of a new dict.
+    Returns False, leaving `row` untouched, if the process can't be read.
+    """
+    stats = _pid_burst_and_age(pid)
+    if stats is None:
+        return False
+    cpu_time, age = stats
+
+    if system_load is None:
+        system_load = get_system_load()
+
+    row[:] = (cpu_time, 0.0, age, 0.0, 1.0, system_load, time_quantum)
+    return True
+
+
+def fill_features_for_pids(
+    X: np.ndarray,
+    pids: Sequence[int],
+    time_quantum: float = 1.0,
+    system_load: Optional[float] = None,
+    skip_errors: bool = False,
+) -> np.ndarray:
+    """
+    fill_features_for_pid for each row of X, in one call so a batch costs a
+    single worker-thread hop. Returns a boolean mask of the rows filled.
+    With skip_errors, a row whose read raises is marked unfilled instead of
+    propagating the exception.
+    """
+    if system_load is None:
+        system_load = get_system_load()
+    ok = np.zeros(len(pids), dtype=bool)
+    for i, pid in enumerate(pids):
+        try:
+            ok[i] = fill_features_for_pid(X[i], pid, time_quantum, system_load)
+        except Exception:
+            if not skip_errors:
+                raise
+    return ok
+
+
+def pick_top_processes(top_n: int = 10, sort_by: str = "cpu_percent", order: str = "desc") -> List[ProcRow]:
+    table = list_processes()
+    idx = table.top(top_n, sort_by, order)
+    return table.rows(idx)
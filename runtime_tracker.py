@@ -1,12 +1,13 @@
 import time
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict, List, Optional
+from typing import Deque, Dict, Iterable, List, Mapping, Optional
 
 import psutil
 
 
-@dataclass
+# slots=True drops the per-instance __dict__ (Python 3.10+); records are mutated in place.
+@dataclass(slots=True)
 class RuntimeRecord:
 	pid: int
 	name: str
@@ -32,6 +33,8 @@ class ProcessRuntimeTracker:
 	def __init__(self, completed_max: int = 20) -> None:
 		self._active: Dict[int, RuntimeRecord] = {}
 		self._completed: Deque[RuntimeRecord] = deque(maxlen=completed_max)
+		# Index over _completed (latest record per PID), kept in sync on append/evict.
+		self._completed_by_pid: Dict[int, RuntimeRecord] = {}
 
 	def _replace_record(self, pid: int, name: str, create_time: float, predicted: float, now: float) -> RuntimeRecord:
 		record = RuntimeRecord(
@@ -45,6 +48,18 @@ class ProcessRuntimeTracker:
 		self._active[pid] = record
 		return record
 
+	def _append_completed(self, record: RuntimeRecord) -> None:
+		if self._completed.maxlen == 0:
+			# Nothing is retained, so nothing to index
+			return
+		if self._completed and len(self._completed) == self._completed.maxlen:
+			evicted = self._completed[0]
+			# A reused PID may already point at a newer record; only drop our own.
+			if self._completed_by_pid.get(evicted.pid) is evicted:
+				del self._completed_by_pid[evicted.pid]
+		self._completed.append(record)
+		self._completed_by_pid[record.pid] = record
+
 	def update_running(self, pid: int, name: str, create_time: float, predicted: float) -> RuntimeRecord:
 		now = time.time()
 		record = self._active.get(pid)
@@ -60,32 +75,47 @@ class ProcessRuntimeTracker:
 		record.last_seen = now
 		return record
 
-	def mark_missing(self, active_pids: List[int]) -> None:
-		active_set = set(active_pids)
+	def mark_missing(
+		self,
+		active_pids: Iterable[int],
+		known_alive: Optional[Mapping[int, Optional[float]]] = None,
+	) -> None:
+		"""
+		Close records for PIDs not in active_pids.
+		known_alive maps PID -> create_time (None if unreadable) from a recent
+		full scan; when given, it replaces the per-PID psutil probe.
+		"""
 		now = time.time()
-		for pid in list(self._active.keys()):
-			if pid in active_set:
-				continue
-
+		# dict_keys set-difference builds a new set, so popping from _active below is safe.
+		missing_pids = self._active.keys() - set(active_pids)
+		for pid in missing_pids:
 			record = self._active.get(pid)
 			if record is None:
 				continue
 
 			should_close = False
-			try:
-				proc = psutil.Process(pid)
-				with proc.oneshot():
-					create_time = proc.create_time()
-				if abs(create_time - record.create_time) > 1.0:
+			if known_alive is not None:
+				if pid in known_alive:
+					create_time = known_alive[pid]
+					# Unreadable create_time: assume still running, as with AccessDenied below.
+					if create_time is None or abs(create_time - record.create_time) <= 1.0:
+						continue
+				should_close = True
+			else:
+				try:
+					proc = psutil.Process(pid)
+					with proc.oneshot():
+						create_time = proc.create_time()
+					if abs(create_time - record.create_time) > 1.0:
+						should_close = True
+					else:
+						# Still same process; keep tracking.
+						continue
+				except psutil.NoSuchProcess:
 					should_close = True
-				else:
-					# Still same process; keep tracking.
+				except psutil.AccessDenied:
+					# If we can't access, assume still running to avoid false completion.
 					continue
-			except psutil.NoSuchProcess:
-				should_close = True
-			except psutil.AccessDenied:
-				# If we can't access, assume still running to avoid false completion.
-				continue
 
 			if should_close:
 				record = self._active.pop(pid, None)
@@ -93,24 +123,24 @@ class ProcessRuntimeTracker:
 					continue
 				record.completed_at = now
 				record.actual_duration = max(record.completed_at - record.create_time, 0.0)
-				self._completed.append(record)
+				self._append_completed(record)
 
 	def current_elapsed(self, pid: int) -> Optional[float]:
 		record = self._active.get(pid)
 		if record:
 			return record.elapsed()
-		for record in self._completed:
-			if record.pid == pid:
-				return record.actual_duration
+		record = self._completed_by_pid.get(pid)
+		if record:
+			return record.actual_duration
 		return None
 
 	def status_for(self, pid: int) -> str:
 		record = self._active.get(pid)
 		if record:
 			return record.status
-		for record in self._completed:
-			if record.pid == pid:
-				return record.status
+		record = self._completed_by_pid.get(pid)
+		if record:
+			return record.status
 		return "unknown"
 
 	def recent_completions(self) -> List[RuntimeRecord]:
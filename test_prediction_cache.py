@@ -0,0 +1,33 @@
+import numpy as np
+
+from prediction_cache import PredictionCache
+from process_manager import FEATURE_ORDER
+
+
+def _rows(*bursts: float, quantum: float = 1.0) -> np.ndarray:
+    X = np.zeros((len(bursts), len(FEATURE_ORDER)), dtype=np.float32)
+    X[:, FEATURE_ORDER.index("mean_burst")] = bursts
+    X[:, FEATURE_ORDER.index("time_quantum")] = quantum
+    return X
+
+
+def test_duplicate_keys_count_as_hits():
+    cache = PredictionCache()
+    # 1.01 and 1.04 round to the same key as 1.0
+    keys = [cache.key(row) for row in _rows(1.0, 1.01, 1.04, 2.0, 2.0).tolist()]
+    found, missing = cache.lookup(keys)
+    assert found == {}
+    assert list(missing.values()) == [0, 3]
+    assert (cache.hits, cache.misses) == (3, 2)
+
+    for key in missing:
+        cache.put(key, 5.0)
+    found, missing = cache.lookup(keys)
+    assert missing == {}
+    assert (cache.hits, cache.misses) == (8, 2)
+
+
+def test_time_quantum_is_keyed_exactly():
+    cache = PredictionCache()
+    (a,), (b,) = _rows(1.0, quantum=0.5).tolist(), _rows(1.0, quantum=0.54).tolist()
+    assert cache.key(a) != cache.key(b)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from process_manager import ProcessTable, _parse_proc_stat
+
+
+def _table(n: int = 500) -> ProcessTable:
+    rng = np.random.default_rng(0)
+    # Mostly-zero cpu_percent, like a real scan: ties are the common case
+    cpu = np.zeros(n)
+    cpu[rng.choice(n, 10, replace=False)] = rng.integers(1, 4, 10)
+    cpu[::37] = np.nan
+    return ProcessTable(
+        pids=np.arange(1000, 1000 + n, dtype=np.int64),
+        names=[f"proc{i % 7}" for i in range(n)],
+        cpu_percent=cpu,
+        memory_percent=rng.integers(0, 5, n).astype(np.float64),
+        cpu_time=np.zeros(n),
+        create_time=np.zeros(n),
+    )
+
+
+@pytest.mark.parametrize("sort_by", ["cpu_percent", "memory_percent", "name"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("k", [0, 1, 10, 25, 50, 499, 500, 600])
+def test_top_matches_order_prefix_with_ties(sort_by, order, k):
+    table = _table()
+    assert np.array_equal(table.top(k, sort_by, order), table.order(sort_by, order)[:k])
+
+
+def test_pages_do_not_overlap():
+    table = _table()
+    page1 = table.top(25, "cpu_percent", "desc")
+    page2 = table.order("cpu_percent", "desc")[25:50]
+    assert not set(page1.tolist()) & set(page2.tolist())
+
+
+def test_missing_values_sort_last():
+    table = _table()
+    for order in ("asc", "desc"):
+        idx = table.order("cpu_percent", order)
+        n_missing = int(np.isnan(table.cpu_percent).sum())
+        assert np.isnan(table.cpu_percent[idx[-n_missing:]]).all()
+
+
+def _stat_line(comm: bytes) -> bytes:
+    # Fields 3..24 of /proc/<pid>/stat: utime=14, stime=15, starttime=22, rss=24
+    fields = [b"S"] + [b"0"] * 21
+    fields[14 - 3], fields[15 - 3] = b"250", b"50"
+    fields[22 - 3], fields[24 - 3] = b"12345", b"1024"
+    return b"123 (" + comm + b") " + b" ".join(fields) + b" 0 0\n"
+
+
+def test_parse_proc_stat_comm_with_spaces_and_parens():
+    assert _parse_proc_stat(_stat_line(b"a) b")) == ("a) b", 250, 50, 12345, 1024)
+    assert _parse_proc_stat(_stat_line(b"(sd-pam)")) == ("(sd-pam)", 250, 50, 12345, 1024)
+
+
+def test_parse_proc_stat_rejects_truncated_lines():
+    line = _stat_line(b"a) b")
+    assert _parse_proc_stat(line[:line.index(b"12345")]) is None
+    assert _parse_proc_stat(b"123 (trunc") is None
+    assert _parse_proc_stat(b"") is None